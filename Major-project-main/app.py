@@ -1,13 +1,19 @@
 import os
+import atexit
 import hmac
 import hashlib
-import json
+import io
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import List, Dict
 
+import orjson
 from flask import Flask, request, abort
 
-from hybrid_detector import analyze_file
+from hybrid_detector import SEV_HIGH, analyze_files
+from ml_model import load_model
 import github_handler
 from notifier import send_slack_notification
 
@@ -22,7 +28,9 @@ app = Flask(__name__)
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
 GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")  # optional
+GITHUB_WEBHOOK_SECRET_BYTES = GITHUB_WEBHOOK_SECRET.encode("utf-8")
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
@@ -30,17 +38,44 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(LOGS_DIR, "detections.log")
 
-# Configure logging to file + console
+# Configure logging to file + console.
+# Records are formatted in the calling thread and put on a queue; a
+# background listener thread does the actual writes, so request and
+# analysis threads never block on disk I/O. The log file is rotated at
+# 10 MB, keeping 5 old files.
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+LOG_LISTENER = QueueListener(
+    _log_queue,
+    RotatingFileHandler(
+        LOG_FILE_PATH, maxBytes=10_000_000, backupCount=5, encoding="utf-8"
+    ),
+    logging.StreamHandler(),
+)
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE_PATH, encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
+    handlers=[QueueHandler(_log_queue)],
 )
+LOG_LISTENER.start()
+atexit.register(LOG_LISTENER.stop)  # flushes queued records on shutdown
 logger = logging.getLogger(__name__)
 
+# Pull requests are analyzed in the background by this pool. Jobs live in
+# memory only, so queued analyses are lost if the server restarts.
+EXECUTOR = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS)
+
+# Load the ML model once at startup so the first webhook does not pay for
+# deserialization.
+try:
+    load_model()
+except FileNotFoundError as exc:
+    logger.warning("ML model not preloaded: %s", exc)
+
+
+# X-Hub-Signature-256 header: "sha256=" followed by 64 hex characters
+SIGNATURE_PREFIX = "sha256="
+SIGNATURE_HEADER_LENGTH = len(SIGNATURE_PREFIX) + 2 * hashlib.sha256().digest_size
+
 
 def verify_github_signature(raw_body: bytes, signature_header: str) -> bool:
     """
@@ -50,18 +85,49 @@ def verify_github_signature(raw_body: bytes, signature_header: str) -> bool:
     if not GITHUB_WEBHOOK_SECRET:
         return True  # not configured, accept all for prototype
 
-    if not signature_header or not signature_header.startswith("sha256="):
+    # Reject malformed headers before computing the HMAC over the body
+    if (
+        not signature_header
+        or len(signature_header) != SIGNATURE_HEADER_LENGTH
+        or not signature_header.startswith(SIGNATURE_PREFIX)
+    ):
+        return False
+
+    try:
+        their_sig = bytes.fromhex(signature_header[len(SIGNATURE_PREFIX):])
+    except ValueError:
         return False
 
-    their_sig = signature_header.split("=", 1)[1]
-    secret_bytes = GITHUB_WEBHOOK_SECRET.encode("utf-8")
-    mac = hmac.new(secret_bytes, msg=raw_body, digestmod=hashlib.sha256)
-    expected_sig = mac.hexdigest()
+    # One-shot HMAC, computed entirely inside OpenSSL
+    expected_sig = hmac.digest(GITHUB_WEBHOOK_SECRET_BYTES, raw_body, "sha256")
 
     # Use hmac.compare_digest to avoid timing attacks
     return hmac.compare_digest(their_sig, expected_sig)
 
 
+REPORT_HEADER_TEMPLATE = (
+    "## Hybrid Vulnerability Detection Report\n"
+    "\n"
+    "> This tool is a decision-support system that uses simple regex rules "
+    "and a supervised text classifier trained on labeled code snippets. "
+    "It does **not** guarantee detection of all vulnerabilities.\n"
+    "\n"
+    "Repository: `{repo}`  \n"
+    "Pull Request: `#{pr}`  \n"
+    "\n"
+)
+
+REPORT_FILE_TEMPLATE = (
+    "### File: `{path}`\n"
+    "- Overall severity: **{severity}**\n"
+    "- ML vulnerability probability: `{probability:.2f}` (label: `{label}`)\n"
+    "- Static findings: `{count}`\n"
+    "\n"
+)
+
+REPORT_FINDING_TEMPLATE = "- `{rule}` at line {line}: `{snippet}`\n"
+
+
 def format_github_report(
     repo_full_name: str, pr_number: int, results: List[Dict]
 ) -> str:
@@ -75,47 +141,40 @@ def format_github_report(
             "No Python files changed in this pull request."
         )
 
-    lines = []
-    lines.append("## Hybrid Vulnerability Detection Report")
-    lines.append("")
-    lines.append(
-        "> This tool is a decision-support system that uses simple regex rules "
-        "and a supervised text classifier trained on labeled code snippets. "
-        "It does **not** guarantee detection of all vulnerabilities."
-    )
-    lines.append("")
-    lines.append(f"Repository: `{repo_full_name}`  ")
-    lines.append(f"Pull Request: `#{pr_number}`  ")
-    lines.append("")
+    buf = io.StringIO()
+    write = buf.write
+    write(REPORT_HEADER_TEMPLATE.format(repo=repo_full_name, pr=pr_number))
 
-    for result in results:
-        file_path = result["file_path"]
-        severity = result["severity"]
+    for idx, result in enumerate(results):
         static_findings = result["static_findings"]
         ml_result = result["ml_result"]
 
-        lines.append(f"### File: `{file_path}`")
-        lines.append(f"- Overall severity: **{severity}**")
-        lines.append(
-            f"- ML vulnerability probability: `{ml_result.get('probability', 0.0):.2f}` "
-            f"(label: `{ml_result.get('label', 'unknown')}`)"
+        if idx:
+            write("\n")  # blank line between file sections
+        write(
+            REPORT_FILE_TEMPLATE.format(
+                path=result["file_path"],
+                severity=result["severity"],
+                probability=ml_result.get("probability", 0.0),
+                label=ml_result.get("label", "unknown"),
+                count=len(static_findings),
+            )
         )
-        lines.append(f"- Static findings: `{len(static_findings)}`")
-        lines.append("")
 
         if static_findings:
-            lines.append("Details from static analysis:")
+            write("Details from static analysis:\n")
             for f in static_findings:
-                rule = f.get("rule")
-                line_no = f.get("line")
-                snippet = f.get("snippet")
-                lines.append(f"- `{rule}` at line {line_no}: `{snippet}`")
-            lines.append("")
+                write(
+                    REPORT_FINDING_TEMPLATE.format(
+                        rule=f.get("rule"),
+                        line=f.get("line"),
+                        snippet=f.get("snippet"),
+                    )
+                )
         else:
-            lines.append("No matches for the current static rules in this file.")
-            lines.append("")
+            write("No matches for the current static rules in this file.\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def log_results_locally(repo_full_name: str, pr_number: int, results: List[Dict]):
@@ -127,76 +186,28 @@ def log_results_locally(repo_full_name: str, pr_number: int, results: List[Dict]
         "pr": pr_number,
         "results": results,
     }
-    logger.info("[analysis] %s", json.dumps(record))
+    logger.info("[analysis] %s", orjson.dumps(record).decode("utf-8"))
 
 
-@app.route("/health", methods=["GET"])
-def health() -> str:
-    """
-    Simple health check endpoint.
-    """
-    return "OK", 200
-
-
-@app.route("/github-webhook", methods=["POST"])
-def github_webhook():
+def process_pr(repo_full_name: str, pr_number: int, token: str) -> None:
     """
-    Main webhook handler for GitHub pull_request events.
+    Analyze a pull request and report the results.
+    Runs on the background executor, after the webhook request was answered.
     Workflow:
-      1. Verify signature (if secret configured).
-      2. Check event type and action.
-      3. Fetch changed Python files from the PR.
-      4. Run static + ML analysis.
-      5. Post a detailed PR comment.
-      6. Send Slack notification if any HIGH severity files exist.
-      7. Log all results locally and print summary to console.
+      1. Fetch changed Python files from the PR.
+      2. Run static + ML analysis.
+      3. Post a detailed PR comment.
+      4. Send Slack notification if any HIGH severity files exist.
+      5. Log all results locally and print summary to console.
     """
-    if not GITHUB_TOKEN:
-        logger.error("GITHUB_TOKEN is not configured.")
-        abort(500, "Server misconfigured: missing GITHUB_TOKEN")
-
-    raw_body = request.get_data()
-    signature_header = request.headers.get("X-Hub-Signature-256", "")
-    if not verify_github_signature(raw_body, signature_header):
-        logger.warning("Invalid GitHub signature. Rejecting request.")
-        abort(401, "Invalid signature")
-
-    event = request.headers.get("X-GitHub-Event", "")
-    if event != "pull_request":
-        # Only handle pull request events.
-        return "Ignored: not a pull_request event", 200
-
-    payload = request.get_json(silent=True)
-    if not payload:
-        abort(400, "Invalid JSON payload")
-
-    action = payload.get("action")
-    if action not in {"opened", "synchronize", "reopened"}:
-        # For prototype, only handle these actions.
-        return f"Ignored: action {action}", 200
-
-    repo = payload.get("repository", {})
-    repo_full_name = repo.get("full_name", "")
-    pr_number = payload.get("number")
-
-    if not repo_full_name or pr_number is None:
-        abort(400, "Missing repository or pull request number")
-
-    logger.info(
-        "Received pull_request event: repo=%s pr=%s action=%s",
-        repo_full_name,
-        pr_number,
-        action,
-    )
-
     # 1. Fetch changed Python files
     try:
         changed_files = github_handler.fetch_changed_python_files(
-            repo_full_name, pr_number, GITHUB_TOKEN
+            repo_full_name, pr_number, token
         )
     except Exception as exc:
         logger.exception("Failed to fetch changed files: %s", exc)
-        abort(500, "Failed to fetch changed files from GitHub")
+        return
 
     if not changed_files:
         logger.info("No changed Python files in this PR.")
@@ -205,21 +216,18 @@ def github_webhook():
             "Hybrid Vulnerability Detection Report\n\n"
             "No Python files were detected in this pull request."
         )
-        github_handler.post_pr_comment(repo_full_name, pr_number, body, GITHUB_TOKEN)
-        return "OK", 200
+        github_handler.post_pr_comment(repo_full_name, pr_number, body, token)
+        return
 
-    # 2. Run analysis per file
-    results: List[Dict] = []
+    # 2. Run analysis for all files (ML predictions are batched in one call)
     high_severity_results: List[Dict] = []
 
-    for file_info in changed_files:
-        filename = file_info["filename"]
-        content = file_info["content"]
-
-        result = analyze_file(filename, content)
-        results.append(result)
+    results = analyze_files(
+        [(file_info["filename"], file_info["content"]) for file_info in changed_files]
+    )
 
-        if result["severity"] == "HIGH":
+    for result in results:
+        if result["severity"] == SEV_HIGH:
             high_severity_results.append(result)
 
     # 3. Build PR comment report
@@ -228,7 +236,7 @@ def github_webhook():
     # 4. Post comment to GitHub
     try:
         github_handler.post_pr_comment(
-            repo_full_name, pr_number, comment_body, GITHUB_TOKEN
+            repo_full_name, pr_number, comment_body, token
         )
     except Exception as exc:
         logger.exception("Failed to post PR comment: %s", exc)
@@ -256,9 +264,80 @@ def github_webhook():
         )
     print("=============================================\n")
 
+
+def _log_background_failure(future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background PR analysis failed: %s", exc, exc_info=exc)
+
+
+@app.route("/health", methods=["GET"])
+def health() -> str:
+    """
+    Simple health check endpoint.
+    """
     return "OK", 200
 
 
+@app.route("/github-webhook", methods=["POST"])
+def github_webhook():
+    """
+    Main webhook handler for GitHub pull_request events.
+    Workflow:
+      1. Verify signature (if secret configured).
+      2. Check event type and action.
+      3. Queue the pull request for analysis (see process_pr) and
+         respond with 202 Accepted.
+    """
+    if not GITHUB_TOKEN:
+        logger.error("GITHUB_TOKEN is not configured.")
+        abort(500, "Server misconfigured: missing GITHUB_TOKEN")
+
+    raw_body = request.get_data()
+    signature_header = request.headers.get("X-Hub-Signature-256", "")
+    if not verify_github_signature(raw_body, signature_header):
+        logger.warning("Invalid GitHub signature. Rejecting request.")
+        abort(401, "Invalid signature")
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event != "pull_request":
+        # Only handle pull request events.
+        return "Ignored: not a pull_request event", 200
+
+    try:
+        payload = orjson.loads(raw_body)
+    except orjson.JSONDecodeError:
+        payload = None
+    if not payload:
+        abort(400, "Invalid JSON payload")
+
+    action = payload.get("action")
+    if action not in {"opened", "synchronize", "reopened"}:
+        # For prototype, only handle these actions.
+        return f"Ignored: action {action}", 200
+
+    repo = payload.get("repository", {})
+    repo_full_name = repo.get("full_name", "")
+    pr_number = payload.get("number")
+
+    if not repo_full_name or pr_number is None:
+        abort(400, "Missing repository or pull request number")
+
+    logger.info(
+        "Received pull_request event: repo=%s pr=%s action=%s",
+        repo_full_name,
+        pr_number,
+        action,
+    )
+
+    # Analysis runs in the background so GitHub gets a response right away
+    # (GitHub treats deliveries slower than 10 seconds as failed).
+    future = EXECUTOR.submit(process_pr, repo_full_name, pr_number, GITHUB_TOKEN)
+    future.add_done_callback(_log_background_failure)
+
+    return "Accepted", 202
+
+
 if __name__ == "__main__":
     # Simple dev server (for production you would use a proper WSGI server)
     port = int(os.getenv("PORT", "5000"))
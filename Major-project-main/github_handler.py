@@ -1,9 +1,79 @@
-import requests
-from typing import List, Dict
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Dict, Tuple
+
+import orjson
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 GITHUB_API_BASE = "https://api.github.com"
 
+# Upper bound on parallel downloads of file contents for one pull request
+MAX_FETCH_WORKERS = 16
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Cached responses (including downloaded source files) are deleted once they
+# are older than this, so the cache does not grow without bound
+CACHE_MAX_AGE = timedelta(days=7)
+# Minimum time between two scans of the cache for old responses
+CACHE_PRUNE_INTERVAL = 3600
+
+# HTTP cache for GitHub GET requests (stored in cache/github_http.sqlite).
+# API responses are always revalidated with a conditional request
+# (If-None-Match / ETag); an unchanged resource returns 304, which does not
+# count against the rate limit. Raw file URLs contain the commit SHA, so
+# their content never changes and is served from the cache directly
+# until it is pruned.
+SESSION = requests_cache.CachedSession(
+    os.path.join(CACHE_DIR, "github_http"),
+    backend="sqlite",
+    expire_after=requests_cache.EXPIRE_IMMEDIATELY,
+    urls_expire_after={
+        "github.com/*/raw/*": CACHE_MAX_AGE,
+        "raw.githubusercontent.com": CACHE_MAX_AGE,
+    },
+)
+
+# Keep-alive connection pool shared by all calls (sized for the parallel
+# content downloads), retrying GitHub's transient gateway errors.
+# POST is not retried by urllib3, so a comment is never posted twice.
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+_last_cache_prune = 0.0
+
+
+def prune_http_cache() -> None:
+    """
+    Delete cached responses older than CACHE_MAX_AGE.
+    Runs at most once per CACHE_PRUNE_INTERVAL seconds.
+    """
+    global _last_cache_prune
+    now = time.monotonic()
+    if _last_cache_prune and now - _last_cache_prune < CACHE_PRUNE_INTERVAL:
+        return
+    _last_cache_prune = now
+    SESSION.cache.delete(older_than=CACHE_MAX_AGE)
+
 
 def _auth_headers(token: str) -> Dict[str, str]:
     return {
@@ -25,12 +95,16 @@ def fetch_changed_python_files(
             'status': 'modified' | 'added' | ...
         }
     """
+    prune_http_cache()
+
     url = f"{GITHUB_API_BASE}/repos/{repo_full_name}/pulls/{pr_number}/files"
-    resp = requests.get(url, headers=_auth_headers(token), timeout=30)
+    resp = SESSION.get(url, headers=_auth_headers(token), timeout=30)
     resp.raise_for_status()
 
-    files_info = resp.json()
-    results: List[Dict[str, str]] = []
+    files_info = orjson.loads(resp.content)
+
+    # (filename, status, content URL) for every Python file
+    python_files: List[Tuple[str, str, str]] = []
 
     for f in files_info:
         filename = f.get("filename", "")
@@ -46,14 +120,33 @@ def fetch_changed_python_files(
             contents_url = f.get("contents_url")
             if not contents_url:
                 continue
-            content_resp = requests.get(
-                contents_url, headers=_auth_headers(token), timeout=30
-            )
+            python_files.append((filename, status, contents_url))
         else:
-            content_resp = requests.get(raw_url, headers=_auth_headers(token), timeout=30)
+            python_files.append((filename, status, raw_url))
+
+    if not python_files:
+        return []
+
+    # Download file contents in parallel; the requests are independent and
+    # the time is spent waiting on GitHub, not on the CPU.
+    headers = _auth_headers(token)
+    max_workers = min(MAX_FETCH_WORKERS, len(python_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        content_resps = list(
+            executor.map(
+                lambda file_entry: SESSION.get(
+                    file_entry[2], headers=headers, timeout=30
+                ),
+                python_files,
+            )
+        )
+
+    results: List[Dict[str, str]] = []
 
+    for (filename, status, _), content_resp in zip(python_files, content_resps):
         if content_resp.status_code == 200:
-            content_text = content_resp.text
+            # Decode as UTF-8 directly; .text would guess the encoding first
+            content_text = content_resp.content.decode("utf-8", errors="replace")
             results.append(
                 {
                     "filename": filename,
@@ -72,10 +165,12 @@ def post_pr_comment(
     Post a regular comment on the pull request using GitHub Issues API.
     """
     url = f"{GITHUB_API_BASE}/repos/{repo_full_name}/issues/{pr_number}/comments"
-    resp = requests.post(
+    headers = _auth_headers(token)
+    headers["Content-Type"] = "application/json"
+    resp = SESSION.post(
         url,
-        headers=_auth_headers(token),
-        json={"body": body},
+        headers=headers,
+        data=orjson.dumps({"body": body}),
         timeout=30,
     )
     resp.raise_for_status()
@@ -1,9 +1,45 @@
-from typing import Dict, Any, List
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 
-from ml_model import predict_vulnerability
+try:
+    from blake3 import blake3
+except ImportError:  # optional accelerator, hashlib's blake2b is used without it
+    blake3 = None
+
+from ml_model import predict_vulnerability_batch
 from static_analysis import analyze_code_static
 
 
+# Severity levels reported per file
+SEV_HIGH = "HIGH"
+SEV_MEDIUM = "MEDIUM"
+SEV_SAFE = "SAFE"
+
+# Files with less code than this (ignoring blank and comment-only lines) are
+# not worth running through the ML model, e.g. empty __init__.py files.
+MIN_ML_CODE_LENGTH = 32
+
+# Text of a line that is neither blank nor a comment
+_CODE_LINE_PATTERN = re.compile(r"^[ \t]*([^\s#].*)$", re.MULTILINE)
+
+
+def _is_trivial(code: str) -> bool:
+    """
+    Return True if the file has less than MIN_ML_CODE_LENGTH characters of
+    code outside blank and comment-only lines. Stops at the first lines
+    that reach the limit, so real files are only scanned briefly.
+    """
+    code_length = 0
+    for match in _CODE_LINE_PATTERN.finditer(code):
+        code_length += len(match.group(1).rstrip())
+        if code_length >= MIN_ML_CODE_LENGTH:
+            return False
+    return True
+
+
 def compute_severity(
     static_findings: List[Dict[str, Any]],
     ml_result: Dict[str, Any],
@@ -20,10 +56,105 @@ def compute_severity(
     ml_flag = ml_prob >= ml_threshold or ml_result.get("label") == "vulnerable"
 
     if has_static and ml_flag:
-        return "HIGHty"
+        return SEV_HIGH
     if has_static or ml_flag:
-        return "MEDIUM"
-    return "SAFEtt"
+        return SEV_MEDIUM
+    return SEV_SAFE
+
+
+# LRU cache of analysis reports keyed by a hash of the file content, so a
+# re-pushed file with unchanged content is not analyzed again.
+ANALYSIS_CACHE_SIZE = 1024
+_ANALYSIS_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_ANALYSIS_CACHE_LOCK = threading.Lock()
+
+
+def _content_key(code: str) -> str:
+    # Not security sensitive, so the fastest available hash is fine
+    data = code.encode("utf-8")
+    if blake3 is not None:
+        return blake3(data).hexdigest(16)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    with _ANALYSIS_CACHE_LOCK:
+        report = _ANALYSIS_CACHE.get(key)
+        if report is not None:
+            _ANALYSIS_CACHE.move_to_end(key)
+        return report
+
+
+def _cache_put(key: str, report: Dict[str, Any]) -> None:
+    with _ANALYSIS_CACHE_LOCK:
+        _ANALYSIS_CACHE[key] = report
+        _ANALYSIS_CACHE.move_to_end(key)
+        while len(_ANALYSIS_CACHE) > ANALYSIS_CACHE_SIZE:
+            _ANALYSIS_CACHE.popitem(last=False)
+
+
+def _build_report(
+    file_path: str,
+    static_findings: List[Dict[str, Any]],
+    ml_result: Dict[str, Any],
+) -> Dict[str, Any]:
+    severity = compute_severity(static_findings, ml_result)
+
+    return {
+        "file_path": file_path,
+        "static_findings": static_findings,
+        "ml_result": ml_result,
+        "severity": severity,
+    }
+
+
+def analyze_files(files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Analyze several files at once.
+    files: list of (file_path, code) tuples.
+    Files whose content was analyzed before are served from the cache.
+    For the rest, static analysis runs per file and the ML model scores them
+    in a single batched call; trivially small files (see _is_trivial) without
+    static findings are rated safe by the ML side without running the model.
+    Returns one report dict (see analyze_file) per input file, in the same
+    order.
+    """
+    keys = [_content_key(code) for _, code in files]
+    reports: List[Optional[Dict[str, Any]]] = [_cache_get(key) for key in keys]
+
+    missing = [idx for idx, report in enumerate(reports) if report is None]
+    static_results = {idx: analyze_code_static(files[idx][1]) for idx in missing}
+    ml_results: Dict[int, Dict[str, Any]] = {}
+
+    # Trivial files with no static findings skip the ML model; the rest
+    # (including tiny files the rules flag) go through one batched call
+    to_predict = []
+    for idx in missing:
+        if not static_results[idx] and _is_trivial(files[idx][1]):
+            ml_results[idx] = {"label": "safe", "probability": 0.0}
+        else:
+            to_predict.append(idx)
+
+    predictions = predict_vulnerability_batch([files[idx][1] for idx in to_predict])
+    ml_results.update(zip(to_predict, predictions))
+
+    for idx in missing:
+        report = _build_report(files[idx][0], static_results[idx], ml_results[idx])
+        _cache_put(keys[idx], report)
+        reports[idx] = report
+
+    # Copy (including the findings and ML result) so callers never mutate
+    # cached reports; a cached report may also have been produced for another
+    # path with the same content.
+    return [
+        dict(
+            report,
+            file_path=file_path,
+            static_findings=[dict(f) for f in report["static_findings"]],
+            ml_result=dict(report["ml_result"]),
+        )
+        for (file_path, _), report in zip(files, reports)
+    ]
 
 
 def analyze_file(file_path: str, code: str) -> Dict[str, Any]:
@@ -37,16 +168,6 @@ def analyze_file(file_path: str, code: str) -> Dict[str, Any]:
             'severity': 'HIGH' | 'MEDIUM' | 'SAFE'
         }
     """
-    static_findings = analyze_code_static(code)
-    ml_result = predict_vulnerability(code)
-
-    severity = compute_severity(static_findings, ml_result)
-
-    return {
-        "file_path": file_path,
-        "static_findings": static_findings,
-        "ml_result": ml_result,
-        "severity": severity,
-    }
+    return analyze_files([(file_path, code)])[0]
 
 
@@ -1,8 +1,9 @@
 import os
 import threading
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 import joblib
+from sklearn import config_context
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, "models", "code_vuln_model.joblib")
@@ -14,9 +15,14 @@ _MODEL_LOCK = threading.Lock()
 def load_model() -> Any:
     """
     Load the trained TF-IDF + Logistic Regression pipeline.
-    Uses a simple in-memory singleton with a thread lock.
+    Uses a simple in-memory singleton. The lock is only taken while the model
+    is not loaded yet (app.py loads it at startup), so predictions never
+    wait on it.
     """
     global _MODEL
+    if _MODEL is not None:
+        return _MODEL
+
     with _MODEL_LOCK:
         if _MODEL is None:
             model_path = os.getenv("ML_MODEL_PATH", DEFAULT_MODEL_PATH)
@@ -41,9 +47,32 @@ def predict_vulnerability(code: str, threshold: float = 0.5) -> Dict[str, Any]:
     Note: This is a statistical classifier trained on labeled examples.
     It supports human reviewers and does not guarantee detection of all vulnerabilities.
     """
+    return predict_vulnerability_batch([code], threshold)[0]
+
+
+def predict_vulnerability_batch(
+    codes: List[str], threshold: float = 0.5
+) -> List[Dict[str, Any]]:
+    """
+    Batched variant of predict_vulnerability.
+    Runs the whole pipeline once over all code strings, which is much cheaper
+    than one predict_proba call per file. Returns one result dict per input,
+    in the same order and format as predict_vulnerability.
+    """
+    if not codes:
+        return []
+
     model = load_model()
-    proba = model.predict_proba([code])[0][1]  # probability of class '1' (vulnerable)
-    label = "vulnerable" if proba >= threshold else "safe"
-    return {"label": label, "probability": float(proba)}
+    # Features are n-gram weights computed from text, so they are always
+    # finite; skip scikit-learn's NaN/inf validation of the feature matrix.
+    with config_context(assume_finite=True):
+        probas = model.predict_proba(codes)[:, 1]  # probability of class '1' (vulnerable)
+    return [
+        {
+            "label": "vulnerable" if proba >= threshold else "safe",
+            "probability": float(proba),
+        }
+        for proba in probas
+    ]
 
 
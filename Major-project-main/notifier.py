@@ -1,6 +1,24 @@
 from typing import List, Dict
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Reused session so repeated alerts keep the connection to Slack alive
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
 
 
 def send_slack_notification(
@@ -41,7 +59,12 @@ def send_slack_notification(
     }
 
     try:
-        resp = requests.post(webhook_url, json=payload, timeout=10)
+        resp = SESSION.post(
+            webhook_url,
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=10,
+        )
         resp.raise_for_status()
     except Exception as exc:
         # For prototype, print error; in production, you'd log more robustly
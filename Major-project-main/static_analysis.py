@@ -1,5 +1,16 @@
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+try:  # regex parser used to derive RULE_FIRST_CHARS
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+try:
+    import re2
+except ImportError:  # optional accelerator, Python's re is used without it
+    re2 = None
 
 
 # --- Regex patterns for demonstration (heuristic, not complete security checks) ---
@@ -34,11 +45,143 @@ UNSAFE_EVAL_PATTERNS = [
 ]
 
 
+RULES = (
+    ("SQL_INJECTION", SQL_INJECTION_PATTERNS),
+    ("HARDCODED_CREDENTIAL", HARDCODED_CREDENTIAL_PATTERNS),
+    ("UNSAFE_EVAL", UNSAFE_EVAL_PATTERNS),
+)
+
+
+# Python's \s matches any Unicode whitespace, RE2's only ASCII whitespace,
+# so RE2 patterns spell out the same set (minus the newline).
+RE2_LINE_SPACE = r"[\t\x0b\x0c\r\x1c-\x1f\x85\p{Z}]"
+
+
+def _single_line_source(pattern: re.Pattern, line_space: str = r"[^\S\n]") -> str:
+    """
+    Rewrite a rule pattern so it can be searched over the whole file while
+    still only matching within one line (rules are defined per line).
+    """
+    source = pattern.pattern.replace(r"\s", line_space)
+    if pattern.flags & re.IGNORECASE:
+        source = f"(?i:{source})"
+    return source
+
+
+def _collect_first_chars(items, chars: set) -> bool:
+    """
+    Add every character a match of the parsed pattern items can start with
+    to chars. Returns False if that set cannot be worked out, e.g. for a
+    leading character class like \s or '.', or a part that may match empty.
+    """
+    for op, av in items:
+        if op is sre_constants.AT:
+            continue  # zero-width, e.g. \b
+        if op is sre_constants.LITERAL:
+            chars.add(chr(av))
+            return True
+        if op is sre_constants.IN:
+            for set_op, set_av in av:
+                if set_op is sre_constants.LITERAL:
+                    chars.add(chr(set_av))
+                elif set_op is sre_constants.RANGE and set_av[1] - set_av[0] < 256:
+                    chars.update(map(chr, range(set_av[0], set_av[1] + 1)))
+                else:
+                    return False
+            return True
+        if op is sre_constants.SUBPATTERN:
+            return _collect_first_chars(av[-1], chars)
+        if op is sre_constants.BRANCH:
+            return all(_collect_first_chars(branch, chars) for branch in av[1])
+        return False
+    return False
+
+
+def _rule_first_chars() -> Optional[str]:
+    """
+    Return every character a rule pattern can start with (lowercased, as the
+    guard matches case-insensitively), or None if some pattern has no
+    fixed set of first characters.
+    """
+    chars: set = set()
+    for _, patterns in RULES:
+        for pattern in patterns:
+            parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+            if not _collect_first_chars(parsed, chars):
+                return None
+    return "".join(sorted({char.lower() for char in chars}))
+
+
+# Every character a rule pattern can start with (matched case-insensitively),
+# derived from the patterns above. The combined pattern checks this first so
+# the regex engine can skip most positions cheaply.
+RULE_FIRST_CHARS = _rule_first_chars()
+
+
+def _build_combined_pattern():
+    """
+    Combine all rule patterns into one alternation, so a file is scanned by
+    a single regex pass instead of once per line and pattern.
+    With google-re2 installed the scan runs on RE2's linear-time DFA, which
+    needs no first-character guard (and does not support lookaheads).
+    Without a RULE_FIRST_CHARS guard the Python pattern is only slower.
+    """
+    if re2 is not None:
+        return re2.compile(
+            "|".join(
+                f"(?:{_single_line_source(pattern, RE2_LINE_SPACE)})"
+                for _, patterns in RULES
+                for pattern in patterns
+            )
+        )
+
+    combined = "|".join(
+        f"(?:{_single_line_source(pattern)})"
+        for _, patterns in RULES
+        for pattern in patterns
+    )
+    if RULE_FIRST_CHARS is None:
+        return re.compile(combined)
+    return re.compile(f"(?=(?i:[{re.escape(RULE_FIRST_CHARS)}]))(?:{combined})")
+
+
+COMBINED_PATTERN = _build_combined_pattern()
+
+
+def _matching_lines(code: str) -> List[Tuple[int, str]]:
+    """
+    Return (line number, line text) for every line matching at least one rule.
+    Line numbers are counted with str.count between consecutive matches, so
+    no per-line strings or newline index are built for the whole file.
+    Windows (\\r\\n) and old Mac (\\r) line endings are normalized to \\n first.
+    """
+    if "\r" in code:
+        code = code.replace("\r\n", "\n").replace("\r", "\n")
+
+    lines: List[Tuple[int, str]] = []
+    line_no = 1
+    line_start = 0
+    line_end = -1
+    for match in COMBINED_PATTERN.finditer(code):
+        if match.start() <= line_end:
+            continue  # line already reported
+
+        match_line_start = code.rfind("\n", 0, match.start()) + 1
+        line_no += code.count("\n", line_start, match_line_start)
+        line_start = match_line_start
+
+        line_end = code.find("\n", match.end())
+        if line_end == -1:
+            line_end = len(code)
+        lines.append((line_no, code[line_start:line_end]))
+    return lines
+
+
 def _scan_patterns(
-    lines: List[str], patterns: List[re.Pattern], rule_name: str
+    lines: List[Tuple[int, str]], patterns: List[re.Pattern], rule_name: str
 ) -> List[Dict]:
     findings: List[Dict] = []
-    for idx, line in enumerate(lines, start=1):
+    for idx, line in lines:
         for pattern in patterns:
             if pattern.search(line):
                 findings.append(
@@ -55,20 +198,20 @@ def _scan_patterns(
 def analyze_code_static(code: str) -> List[Dict]:
     """
     Run simple regex-based static analysis.
+    The combined pattern (RE2 when available) finds candidate lines in one
+    pass over the file; only those lines are then checked against the
+    individual rule patterns with Python's re.
     Returns a list of findings, each a dict with:
       - rule
       - line
       - snippet
       - pattern
     """
-    lines = code.splitlines()
+    lines = _matching_lines(code)
 
     findings: List[Dict] = []
-    findings.extend(_scan_patterns(lines, SQL_INJECTION_PATTERNS, "SQL_INJECTION"))
-    findings.extend(
-        _scan_patterns(lines, HARDCODED_CREDENTIAL_PATTERNS, "HARDCODED_CREDENTIAL")
-    )
-    findings.extend(_scan_patterns(lines, UNSAFE_EVAL_PATTERNS, "UNSAFE_EVAL"))
+    for rule_name, patterns in RULES:
+        findings.extend(_scan_patterns(lines, patterns, rule_name))
 
     return findings
 
@@ -1,8 +1,11 @@
 import os
+import argparse
 import csv
 from typing import List, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
@@ -14,6 +17,8 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_PATH = os.path.join(BASE_DIR, "dataset.csv")
 MODELS_DIR = os.path.join(BASE_DIR, "models")
 MODEL_PATH = os.path.join(MODELS_DIR, "code_vuln_model.joblib")
+FEATURES_DIR = os.path.join(MODELS_DIR, "features")
+FEATURE_FILE_SUFFIXES = ("_vectorizer.joblib", "_train.npz", "_test.npz")
 
 
 def load_dataset(path: str) -> Tuple[List[str], List[int]]:
@@ -44,27 +49,116 @@ def load_dataset(path: str) -> Tuple[List[str], List[int]]:
     return X, y
 
 
-def build_pipeline() -> Pipeline:
+def build_vectorizer() -> Pipeline:
     """
-    Build a simple TF-IDF + Logistic Regression pipeline.
-    This is a lightweight text classifier used only as a decision-support signal.
+    Build the TF-IDF feature extraction part of the model.
+    Character n-grams are hashed into a fixed-size float32 feature space
+    instead of being stored in a vocabulary, which keeps the saved model small.
     """
-    vectorizer = TfidfVectorizer(
+    hashing = HashingVectorizer(
         analyzer="char_wb",
         ngram_range=(3, 5),
-        min_df=1,
+        n_features=2**18,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
     )
-    classifier = LogisticRegression(max_iter=1000)
-    pipeline = Pipeline(
+    return Pipeline(
         [
-            ("tfidf", vectorizer),
-            ("clf", classifier),
+            ("hashing", hashing),
+            ("tfidf", TfidfTransformer()),
         ]
     )
-    return pipeline
+
+
+def fit_vectorizer(
+    X_train: List[str], X_test: List[str]
+) -> Tuple[Pipeline, sp.csr_matrix, sp.csr_matrix]:
+    """
+    Fit the vectorizer on the training split and transform both splits.
+    Extracting the character n-grams is the slowest part of training, so the
+    fitted vectorizer and both feature matrices are cached in FEATURES_DIR,
+    keyed by the split contents and vectorizer settings. Later runs with the
+    same data (e.g. when tuning the classifier) load them instead. Only the
+    latest set is kept.
+    """
+    vectorizer = build_vectorizer()
+    cache_key = joblib.hash((X_train, X_test, vectorizer.get_params()))
+    vectorizer_path, train_path, test_path = (
+        os.path.join(FEATURES_DIR, cache_key + suffix)
+        for suffix in FEATURE_FILE_SUFFIXES
+    )
+
+    if all(os.path.exists(p) for p in (vectorizer_path, train_path, test_path)):
+        print("[train_model] Loading cached features from", FEATURES_DIR)
+        return (
+            joblib.load(vectorizer_path),
+            sp.load_npz(train_path),
+            sp.load_npz(test_path),
+        )
+
+    print("[train_model] Extracting features...")
+    X_train_vec = vectorizer.fit_transform(X_train)
+    X_test_vec = vectorizer.transform(X_test)
+
+    os.makedirs(FEATURES_DIR, exist_ok=True)
+    joblib.dump(vectorizer, vectorizer_path)
+    sp.save_npz(train_path, X_train_vec)
+    sp.save_npz(test_path, X_test_vec)
+
+    # Drop features cached for an older dataset or vectorizer configuration
+    for name in os.listdir(FEATURES_DIR):
+        if name.endswith(FEATURE_FILE_SUFFIXES) and not name.startswith(cache_key):
+            os.remove(os.path.join(FEATURES_DIR, name))
+
+    return vectorizer, X_train_vec, X_test_vec
+
+
+def train_classifier(
+    X_train_vec: sp.csr_matrix, y_train: List[int], C: float, max_iter: int
+) -> LogisticRegression:
+    """
+    Fit the Logistic Regression classifier on precomputed features.
+    This is a lightweight text classifier used only as a decision-support signal.
+    """
+    classifier = LogisticRegression(C=C, max_iter=max_iter)
+    classifier.fit(X_train_vec, y_train)
+    return classifier
+
+
+def compact_classifier(classifier: LogisticRegression) -> None:
+    """
+    Store the trained classifier weights as sparse float32.
+    Only n-grams seen during training get non-zero weights, so most of the
+    2**18 hashed features have a weight of exactly zero.
+    """
+    classifier.coef_ = classifier.coef_.astype(np.float32)
+    classifier.intercept_ = classifier.intercept_.astype(np.float32)
+    classifier.sparsify()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Train and save the TF-IDF + Logistic Regression model."
+    )
+    parser.add_argument(
+        "--C",
+        type=float,
+        default=1.0,
+        help="Inverse regularization strength of the classifier (default: 1.0)",
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        default=1000,
+        help="Maximum solver iterations of the classifier (default: 1000)",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = parse_args()
+
     print("[train_model] Loading dataset from", DATASET_PATH)
     X, y = load_dataset(DATASET_PATH)
 
@@ -74,19 +168,23 @@ def main() -> None:
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    model = build_pipeline()
-    print("[train_model] Training model...")
-    model.fit(X_train, y_train)
+    vectorizer, X_train_vec, X_test_vec = fit_vectorizer(X_train, X_test)
+
+    print(f"[train_model] Training model (C={args.C}, max_iter={args.max_iter})...")
+    classifier = train_classifier(X_train_vec, y_train, args.C, args.max_iter)
+    compact_classifier(classifier)
 
     print("[train_model] Evaluating on test set...")
-    y_pred = model.predict(X_test)
+    y_pred = classifier.predict(X_test_vec)
     acc = accuracy_score(y_test, y_pred)
     print(f"[train_model] Accuracy: {acc:.3f}")
     print("[train_model] Classification report:")
     print(classification_report(y_test, y_pred, target_names=["safe", "vulnerable"]))
 
+    model = Pipeline(vectorizer.steps + [("clf", classifier)])
+
     os.makedirs(MODELS_DIR, exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    joblib.dump(model, MODEL_PATH, compress=3)
     print(f"[train_model] Model saved to {MODEL_PATH}")
 
 